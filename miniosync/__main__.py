@@ -1,9 +1,13 @@
 from __future__ import annotations
 
 import argparse
+import os
 import sys
 
-from .config import load_config
+from .bench import run_benchmark
+from .config import ENGINES, load_config
+from .daemon import load_daemon_config, run_daemon
+from .shard import parse_shard_spec, spawn_local_shards, summarize_shard_reports
 from .sync import sync_down, sync_up, watch_loop
 
 
@@ -18,6 +22,12 @@ def build_parser() -> argparse.ArgumentParser:
         sp.add_argument("--config", required=True, help="配置文件路径 config.yaml")
         sp.add_argument("--mirror", action="store_true", help="镜像删除")
         sp.add_argument("--watch", type=int, default=0, help="轮询间隔秒，0 表示只执行一次")
+        sp.add_argument("--journal", default="", help="续传日志路径，中断后重新运行可跳过已完成的对象")
+        sp.add_argument("--shard", default="", help="分片 I/N：只处理第 I 个分片（共 N 个，I 从 0 开始）")
+        sp.add_argument("--shard-depth", type=int, default=None, help="按前几层目录分片，0 表示按完整路径")
+        sp.add_argument("--report-dir", default="", help="分片结果输出目录，用于汇总")
+        sp.add_argument("--run-id", default="", help="本次运行的标识，写入分片结果；多机运行时各 worker 需使用相同的值")
+        sp.add_argument("--spawn", type=int, default=0, help="在本机启动 N 个分片进程并汇总结果")
 
     up = sync_sub.add_parser("up", help="本地 -> MinIO")
     add_common(up)
@@ -25,6 +35,19 @@ def build_parser() -> argparse.ArgumentParser:
     down = sync_sub.add_parser("down", help="MinIO -> 本地")
     add_common(down)
 
+    daemon = sub.add_parser("daemon", help="在一个进程内按计划运行多个同步任务")
+    daemon.add_argument("--config", required=True, help="daemon 配置文件路径 daemon.yaml")
+
+    summary = sub.add_parser("summary", help="汇总各分片的同步结果")
+    summary.add_argument("--report-dir", required=True, help="分片结果目录")
+    summary.add_argument("--run-id", default="", help="只汇总该次运行的结果，默认取最新一次")
+
+    bench = sub.add_parser("bench", help="对比 thread 与 async 引擎的上传/下载性能")
+    bench.add_argument("--config", required=True, help="配置文件路径 config.yaml（使用其连接与并发参数）")
+    bench.add_argument("--files", type=int, default=2000, help="测试文件数量")
+    bench.add_argument("--size", type=int, default=4096, help="单个文件大小（字节）")
+    bench.add_argument("--engines", default="thread,async", help="参与对比的引擎，逗号分隔")
+
     return p
 
 
@@ -32,22 +55,60 @@ def main(argv: list[str] | None = None) -> int:
     parser = build_parser()
     ns = parser.parse_args(argv)
 
+    if ns.cmd == "daemon":
+        run_daemon(load_daemon_config(ns.config))
+        return 0
+    if ns.cmd == "summary":
+        return summarize_shard_reports(ns.report_dir, ns.run_id)
+    if ns.cmd == "bench":
+        engines = [e.strip() for e in ns.engines.split(",") if e.strip()]
+        unknown = [e for e in engines if e not in ENGINES]
+        if not engines or unknown:
+            parser.error(f"--engines 只能包含 {', '.join(ENGINES)}: {ns.engines}")
+        run_benchmark(load_config(ns.config), ns.files, ns.size, engines)
+        return 0
+
+    if ns.spawn > 0:
+        if ns.watch or ns.shard or ns.run_id:
+            parser.error("--spawn 不能与 --watch、--shard 或 --run-id 同时使用")
+        report_dir = os.path.abspath(ns.report_dir or os.path.join(os.getcwd(), ".miniosync-shards"))
+        extra: list[str] = []
+        if ns.mirror:
+            extra.append("--mirror")
+        if ns.journal:
+            extra += ["--journal", os.path.abspath(ns.journal)]
+        if ns.shard_depth is not None:
+            extra += ["--shard-depth", str(ns.shard_depth)]
+        return spawn_local_shards(ns.direction, os.path.abspath(ns.config), ns.spawn, report_dir, extra)
+
     cfg = load_config(ns.config)
     if ns.mirror:
         cfg.delete_extraneous = True
+    if ns.journal:
+        cfg.journal_path = os.path.abspath(ns.journal)
+    if ns.shard:
+        try:
+            cfg.shard_index, cfg.shard_count = parse_shard_spec(ns.shard)
+        except ValueError as e:
+            parser.error(str(e))
+    if ns.shard_depth is not None:
+        cfg.shard_depth = max(0, ns.shard_depth)
+    if ns.report_dir:
+        cfg.report_dir = os.path.abspath(ns.report_dir)
+    cfg.run_id = ns.run_id
 
     if ns.direction == "up":
         if ns.watch and ns.watch > 0:
             watch_loop("up", cfg, ns.watch)
         else:
-            sync_up(cfg)
-            return 0
+            result = sync_up(cfg)
+            return 1 if result.failures else 0
     elif ns.direction == "down":
         if ns.watch and ns.watch > 0:
             watch_loop("down", cfg, ns.watch)
         else:
-            sync_down(cfg)
-            return 0
+            result = sync_down(cfg)
+            return 1 if result.failures else 0
     return 0
 
 
@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import concurrent.futures
+import hashlib
+import os
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+from urllib.parse import quote, urlsplit
+from xml.etree import ElementTree
+
+from minio.credentials import Credentials
+from minio.signer import sign_v4_s3
+from minio.time import to_amz_date
+
+from .client import RETRYABLE_S3_CODES, call_with_retry, is_retryable_error, retry_delay
+from .config import SyncConfig
+from .journal import SyncJournal
+from .sync import _local_fingerprint, _walk, need_download, need_upload
+
+try:
+    import aiohttp
+    from yarl import URL
+except ImportError:  # aiohttp 仅在 engine: async 时需要
+    aiohttp = None
+
+T = TypeVar("T")
+
+EMPTY_SHA256 = hashlib.sha256(b"").hexdigest()
+
+# 超过该大小的对象交给 minio 客户端（分片上传/流式下载）在线程中处理，
+# 异步路径只处理能整体读入内存的小对象
+LARGE_OBJECT_SIZE = 8 * 1024 * 1024
+
+
+class AsyncS3Error(Exception):
+    def __init__(self, code: str, status: int, message: str) -> None:
+        super().__init__(f"{code or status}: {message}")
+        self.code = code
+        self.status = status
+        self.message = message
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, AsyncS3Error):
+        return exc.code in RETRYABLE_S3_CODES or exc.status >= 500 or exc.status == 429
+    if aiohttp is not None and isinstance(exc, aiohttp.ClientError):
+        return True
+    return isinstance(exc, asyncio.TimeoutError) or is_retryable_error(exc)
+
+
+async def _retry(fn: Callable[[], Awaitable[T]], retries: int, backoff: float) -> T:
+    attempt = 0
+    while True:
+        try:
+            return await fn()
+        except Exception as e:
+            if attempt >= retries or not _is_retryable(e):
+                raise
+            await asyncio.sleep(retry_delay(attempt, backoff))
+            attempt += 1
+
+
+class AsyncS3Client:
+    """最小的 S3 兼容异步客户端：path-style 请求 + SigV4 签名，仅支持 PUT/GET 对象。"""
+
+    def __init__(self, cfg: SyncConfig, session: "aiohttp.ClientSession") -> None:
+        self.session = session
+        self.host = cfg.endpoint
+        self.base_url = ("https://" if cfg.secure else "http://") + cfg.endpoint
+        self.region = cfg.region
+        self.credentials = Credentials(cfg.access_key, cfg.secret_key)
+
+    def _url(self, bucket: str, key: str) -> str:
+        return f"{self.base_url}/{bucket}/{quote(key)}"
+
+    def _sign(self, method: str, url: str, content_sha256: str, extra: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        date = datetime.now(timezone.utc)
+        headers = {
+            "Host": self.host,
+            "x-amz-date": to_amz_date(date),
+            "x-amz-content-sha256": content_sha256,
+        }
+        headers.update(extra or {})
+        return sign_v4_s3(method, urlsplit(url), self.region, headers, self.credentials, content_sha256, date)
+
+    async def _raise_for_status(self, resp: "aiohttp.ClientResponse") -> None:
+        body = await resp.text(errors="replace")
+        code, message = "", body[:200]
+        try:
+            root = ElementTree.fromstring(body)
+            code = root.findtext("Code") or ""
+            message = root.findtext("Message") or message
+        except ElementTree.ParseError:
+            pass
+        raise AsyncS3Error(code, resp.status, message)
+
+    async def put_object(self, bucket: str, key: str, data: bytes, sha256_hex: str, md5_b64: str) -> None:
+        url = self._url(bucket, key)
+        headers = self._sign("PUT", url, sha256_hex, {"Content-MD5": md5_b64, "Content-Length": str(len(data))})
+        async with self.session.put(URL(url, encoded=True), data=data, headers=headers) as resp:
+            if resp.status != 200:
+                await self._raise_for_status(resp)
+            await resp.read()
+
+    async def get_object(self, bucket: str, key: str) -> bytes:
+        url = self._url(bucket, key)
+        headers = self._sign("GET", url, EMPTY_SHA256)
+        async with self.session.get(URL(url, encoded=True), headers=headers) as resp:
+            if resp.status != 200:
+                await self._raise_for_status(resp)
+            return await resp.read()
+
+
+class _ByteBudget:
+    # 限制同时驻留内存的对象数据总量
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.used = 0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self, n: int) -> int:
+        n = min(n, self.limit)
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.used + n <= self.limit)
+            self.used += n
+        return n
+
+    async def release(self, n: int) -> None:
+        async with self._cond:
+            self.used -= n
+            self._cond.notify_all()
+
+
+def _read_and_hash(path: str) -> Tuple[bytes, str, str]:
+    with open(path, "rb") as f:
+        data = f.read()
+    return data, hashlib.sha256(data).hexdigest(), base64.b64encode(hashlib.md5(data).digest()).decode()
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".part.miniosync"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+async def _run_workers(
+    items: List[T],
+    fn: Callable[[T], Awaitable[bool]],
+    key: Callable[[T], str],
+    concurrency: int,
+) -> Tuple[int, int, List[Tuple[str, str]]]:
+    # 固定数量的 worker 协程从同一个迭代器取任务，而不是每个对象一个 task，
+    # 这样在对象数量很大时内存占用也是有界的
+    it = iter(items)
+    counts = [0, 0]
+    failures: List[Tuple[str, str]] = []
+
+    async def worker() -> None:
+        for item in it:
+            try:
+                if await fn(item):
+                    counts[0] += 1
+                else:
+                    counts[1] += 1
+            except Exception as e:
+                failures.append((key(item), f"{type(e).__name__}: {e}"))
+
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, max(1, len(items))))))
+    return counts[0], counts[1], failures
+
+
+class _Engine:
+    def __init__(self, client, cfg: SyncConfig, journal: Optional[SyncJournal]) -> None:
+        self.client = client
+        self.cfg = cfg
+        self.journal = journal
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=min(64, cfg.async_concurrency))
+        self.budget = _ByteBudget(cfg.async_memory_mb * 1024 * 1024)
+
+    async def run(self, fn: Callable, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.pool, fn, *args)
+
+    def _object_name(self, rel: str) -> str:
+        return self.cfg.prefix + rel if self.cfg.prefix else rel
+
+    def _prepare_upload(self, remote_index: Dict[str, Tuple[str, int]], local_path: str, rel: str) -> Tuple[str, int, bool]:
+        fingerprint = _local_fingerprint(local_path)
+        if self.journal is not None and self.journal.is_done(rel, fingerprint):
+            return fingerprint, 0, False
+        if not need_upload(self.cfg, remote_index, local_path, rel):
+            return fingerprint, 0, False
+        return fingerprint, os.path.getsize(local_path), True
+
+    async def upload(self, s3: AsyncS3Client, remote_index: Dict[str, Tuple[str, int]]) -> Tuple[int, int, List[Tuple[str, str]]]:
+        cfg = self.cfg
+
+        async def do_upload(item: Tuple[str, str]) -> bool:
+            local_path, rel = item
+            fingerprint, size, needed = await self.run(self._prepare_upload, remote_index, local_path, rel)
+            if not needed:
+                return False
+            object_name = self._object_name(rel)
+            if size > LARGE_OBJECT_SIZE:
+                await self.run(
+                    call_with_retry,
+                    lambda: self.client.fput_object(cfg.bucket, object_name, local_path),
+                    cfg.retries,
+                    cfg.retry_backoff,
+                )
+            else:
+                held = await self.budget.acquire(size)
+                try:
+                    data, sha256_hex, md5_b64 = await self.run(_read_and_hash, local_path)
+                    await _retry(
+                        lambda: s3.put_object(cfg.bucket, object_name, data, sha256_hex, md5_b64),
+                        cfg.retries,
+                        cfg.retry_backoff,
+                    )
+                finally:
+                    await self.budget.release(held)
+            if self.journal is not None:
+                await self.run(self.journal.record, rel, fingerprint)
+            return True
+
+        items = list(_walk(cfg))
+        return await _run_workers(items, do_upload, lambda it: it[1], cfg.async_concurrency)
+
+    def _prepare_download(self, rel: str, etag: str, size: int) -> bool:
+        local_path = os.path.join(self.cfg.local_dir, rel.replace("/", os.sep))
+        if self.journal is not None and self.journal.is_done(rel, f"{etag}:{size}") and os.path.exists(local_path):
+            return False
+        return need_download(self.cfg, rel, etag, size)
+
+    async def download(self, s3: AsyncS3Client, remote_index: Dict[str, Tuple[str, int]]) -> Tuple[int, int, List[Tuple[str, str]]]:
+        cfg = self.cfg
+
+        async def do_download(item: Tuple[str, Tuple[str, int]]) -> bool:
+            rel, (etag, size) = item
+            if not await self.run(self._prepare_download, rel, etag, size):
+                return False
+            object_name = self._object_name(rel)
+            local_path = os.path.join(cfg.local_dir, rel.replace("/", os.sep))
+            if size > LARGE_OBJECT_SIZE:
+                os.makedirs(os.path.dirname(local_path), exist_ok=True)
+                await self.run(
+                    call_with_retry,
+                    lambda: self.client.fget_object(cfg.bucket, object_name, local_path),
+                    cfg.retries,
+                    cfg.retry_backoff,
+                )
+            else:
+                held = await self.budget.acquire(size)
+                try:
+                    data = await _retry(lambda: s3.get_object(cfg.bucket, object_name), cfg.retries, cfg.retry_backoff)
+                    await self.run(_write_atomic, local_path, data)
+                finally:
+                    await self.budget.release(held)
+            if self.journal is not None:
+                await self.run(self.journal.record, rel, f"{etag}:{size}")
+            return True
+
+        items = list(remote_index.items())
+        return await _run_workers(items, do_download, lambda it: it[0], cfg.async_concurrency)
+
+
+async def _transfer(client, cfg: SyncConfig, remote_index: Dict[str, Tuple[str, int]], journal, direction: str):
+    engine = _Engine(client, cfg, journal)
+    connector = aiohttp.TCPConnector(limit=cfg.async_concurrency)
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=60, sock_read=300)
+    try:
+        # auto_decompress=False：按原始字节保存对象，即使其带有 Content-Encoding
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, auto_decompress=False) as session:
+            s3 = AsyncS3Client(cfg, session)
+            if direction == "up":
+                return await engine.upload(s3, remote_index)
+            return await engine.download(s3, remote_index)
+    finally:
+        engine.pool.shutdown(wait=True)
+
+
+def _require_aiohttp() -> None:
+    if aiohttp is None:
+        raise RuntimeError("engine: async 需要安装 aiohttp：pip install aiohttp")
+
+
+def upload_missing_and_changed_async(
+    client,
+    cfg: SyncConfig,
+    remote_index: Dict[str, Tuple[str, int]],
+    journal: Optional[SyncJournal] = None,
+) -> Tuple[int, int, List[Tuple[str, str]]]:
+    _require_aiohttp()
+    return asyncio.run(_transfer(client, cfg, remote_index, journal, "up"))
+
+
+def download_missing_and_changed_async(
+    client,
+    cfg: SyncConfig,
+    remote_index: Dict[str, Tuple[str, int]],
+    journal: Optional[SyncJournal] = None,
+) -> Tuple[int, int, List[Tuple[str, str]]]:
+    _require_aiohttp()
+    return asyncio.run(_transfer(client, cfg, remote_index, journal, "down"))
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import dataclasses
+import os
+import shutil
+import tempfile
+import time
+from typing import List, Tuple
+
+from .client import build_minio_client, ensure_bucket, iter_objects, remove_objects
+from .config import SyncConfig
+from .sync import sync_down, sync_up
+
+
+def _make_files(base_dir: str, count: int, size: int) -> None:
+    # 每个子目录最多 1000 个文件，避免单目录过大
+    for i in range(count):
+        sub = os.path.join(base_dir, f"d{i // 1000:04d}")
+        os.makedirs(sub, exist_ok=True)
+        with open(os.path.join(sub, f"f{i:07d}.bin"), "wb") as f:
+            f.write(os.urandom(size))
+
+
+def run_benchmark(cfg: SyncConfig, count: int, size: int, engines: List[str]) -> List[Tuple[str, str, float]]:
+    client = build_minio_client(cfg.endpoint, cfg.access_key, cfg.secret_key, cfg.secure)
+    ensure_bucket(client, cfg.bucket)
+    work_dir = tempfile.mkdtemp(prefix="miniosync-bench-")
+    src_dir = os.path.join(work_dir, "src")
+    results: List[Tuple[str, str, float]] = []
+    try:
+        _make_files(src_dir, count, size)
+        for engine in engines:
+            bench_cfg = dataclasses.replace(
+                cfg,
+                prefix=f"{cfg.prefix}miniosync-bench/{engine}/",
+                local_dir=src_dir,
+                include=["*"],
+                exclude=[],
+                delete_extraneous=False,
+                journal_path="",
+                shard_count=1,
+                shard_index=0,
+                report_dir="",
+                engine=engine,
+            )
+            start = time.perf_counter()
+            sync_up(bench_cfg, client=client, label=f"{engine} up")
+            results.append((engine, "up", time.perf_counter() - start))
+
+            bench_cfg.local_dir = os.path.join(work_dir, f"dst-{engine}")
+            start = time.perf_counter()
+            sync_down(bench_cfg, client=client, label=f"{engine} down")
+            results.append((engine, "down", time.perf_counter() - start))
+
+            keys = [obj.object_name for obj in iter_objects(client, cfg.bucket, bench_cfg.prefix) if not obj.is_dir]
+            remove_objects(client, cfg.bucket, keys)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    total_mb = count * size / (1024 * 1024)
+    print(f"{'engine':<8} {'op':<5} {'seconds':>9} {'objects/s':>11} {'MB/s':>9}")
+    for engine, op, seconds in results:
+        print(f"{engine:<8} {op:<5} {seconds:>9.2f} {count / seconds:>11.1f} {total_mb / seconds:>9.2f}")
+    return results
@@ -1,18 +1,62 @@
 from __future__ import annotations
 
-from typing import Iterable, Optional, Tuple
+import os
+import random
+import time
+from typing import Callable, Iterable, Optional, Tuple, TypeVar
 
+import certifi
+import urllib3
 from minio import Minio
 from minio.deleteobjects import DeleteObject
+from minio.error import InvalidResponseError, S3Error, ServerError
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
 
+T = TypeVar("T")
 
-def build_minio_client(endpoint: str, access_key: str, secret_key: str, secure: bool) -> Minio:
-    return Minio(endpoint, access_key=access_key, secret_key=secret_key, secure=secure)
+# 服务端限流/临时故障，重试有意义
+RETRYABLE_S3_CODES = {
+    "InternalError",
+    "RequestTimeout",
+    "ServiceUnavailable",
+    "SlowDown",
+    "SlowDownRead",
+    "SlowDownWrite",
+    "OperationAborted",
+    "XMinioServerNotInitialized",
+}
+
+
+def build_minio_client(
+    endpoint: str,
+    access_key: str,
+    secret_key: str,
+    secure: bool,
+    http_client: Optional[urllib3.PoolManager] = None,
+) -> Minio:
+    return Minio(endpoint, access_key=access_key, secret_key=secret_key, secure=secure, http_client=http_client)
+
+
+def build_http_pool(maxsize: int) -> urllib3.PoolManager:
+    # 与 minio 默认连接池参数一致，仅放大 maxsize，便于多个任务共享同一 endpoint 的连接
+    timeout = 300
+    return urllib3.PoolManager(
+        timeout=urllib3.Timeout(connect=timeout, read=timeout),
+        maxsize=max(1, maxsize),
+        cert_reqs="CERT_REQUIRED",
+        ca_certs=os.environ.get("SSL_CERT_FILE") or certifi.where(),
+        retries=urllib3.Retry(total=5, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504]),
+    )
 
 
 def ensure_bucket(client: Minio, bucket: str) -> None:
     if not client.bucket_exists(bucket):
-        client.make_bucket(bucket)
+        try:
+            client.make_bucket(bucket)
+        except S3Error as e:
+            # 多个分片进程同时创建同一个桶
+            if e.code != "BucketAlreadyOwnedByYou":
+                raise
 
 
 def iter_objects(client: Minio, bucket: str, prefix: str) -> Iterable:
@@ -25,3 +69,27 @@ def remove_objects(client: Minio, bucket: str, keys: Iterable[str]) -> None:
         pass
 
 
+def is_retryable_error(exc: BaseException) -> bool:
+    if isinstance(exc, S3Error):
+        return exc.code in RETRYABLE_S3_CODES
+    if isinstance(exc, ServerError):
+        return exc.status_code >= 500 or exc.status_code == 429
+    # 网络层错误；注意本地文件错误（FileNotFoundError 等）不重试
+    return isinstance(exc, (InvalidResponseError, Urllib3HTTPError, ConnectionError, TimeoutError))
+
+
+def retry_delay(attempt: int, backoff: float, max_backoff: float = 30.0) -> float:
+    # full jitter：在 [0, backoff * 2^attempt] 内随机等待，避免大量对象同时重试
+    return random.uniform(0, min(max_backoff, backoff * (2 ** attempt)))
+
+
+def call_with_retry(fn: Callable[[], T], retries: int, backoff: float) -> T:
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception as e:
+            if attempt >= retries or not is_retryable_error(e):
+                raise
+            time.sleep(retry_delay(attempt, backoff))
+            attempt += 1
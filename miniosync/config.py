@@ -6,6 +6,8 @@ from typing import List, Optional
 
 import yaml
 
+ENGINES = ("thread", "async")
+
 
 @dataclass
 class SyncConfig:
@@ -26,12 +28,45 @@ class SyncConfig:
     etag_by_content: bool = False
     delete_extraneous: bool = False
 
+    retries: int = 3
+    retry_backoff: float = 0.5
+    journal_path: str = ""
+
+    shard_index: int = 0
+    shard_count: int = 1
+    shard_depth: int = 1
+    report_dir: str = ""
+    run_id: str = ""  # 仅由命令行 --run-id 设置，用于区分各次运行的分片结果
+
+    engine: str = "thread"  # thread | async
+    async_concurrency: int = 256
+    async_memory_mb: int = 256
+    region: str = "us-east-1"
+
     def normalize(self) -> None:
         self.local_dir = os.path.abspath(self.local_dir)
         if self.prefix and not self.prefix.endswith("/"):
             self.prefix = self.prefix + "/"
         if self.concurrency < 1:
             self.concurrency = 1
+        if self.retries < 0:
+            self.retries = 0
+        if self.journal_path:
+            self.journal_path = os.path.abspath(self.journal_path)
+        if self.shard_count < 1:
+            self.shard_count = 1
+        if not (0 <= self.shard_index < self.shard_count):
+            raise ValueError(f"shard_index 应在 [0, {self.shard_count}) 内: {self.shard_index}")
+        if self.shard_depth < 0:
+            self.shard_depth = 0
+        if self.report_dir:
+            self.report_dir = os.path.abspath(self.report_dir)
+        if self.engine not in ENGINES:
+            raise ValueError(f"engine 只能是 thread 或 async: {self.engine}")
+        if self.async_concurrency < 1:
+            self.async_concurrency = 1
+        if self.async_memory_mb < 1:
+            self.async_memory_mb = 1
 
 
 def load_config(path: str) -> SyncConfig:
@@ -50,6 +85,17 @@ def load_config(path: str) -> SyncConfig:
         concurrency=int(data.get("concurrency", 4)),
         etag_by_content=bool(data.get("etag_by_content", False)),
         delete_extraneous=bool(data.get("delete_extraneous", False)),
+        retries=int(data.get("retries", 3)),
+        retry_backoff=float(data.get("retry_backoff", 0.5)),
+        journal_path=str(data.get("journal_path", "") or ""),
+        shard_index=int(data.get("shard_index", 0)),
+        shard_count=int(data.get("shard_count", 1)),
+        shard_depth=int(data.get("shard_depth", 1)),
+        report_dir=str(data.get("report_dir", "") or ""),
+        engine=str(data.get("engine", "thread")),
+        async_concurrency=int(data.get("async_concurrency", 256)),
+        async_memory_mb=int(data.get("async_memory_mb", 256)),
+        region=str(data.get("region", "us-east-1")),
     )
     cfg.normalize()
     return cfg
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import concurrent.futures
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+import yaml
+from apscheduler.executors.pool import ThreadPoolExecutor as SchedulerThreadPool
+from apscheduler.schedulers.background import BackgroundScheduler
+from minio import Minio
+
+from .client import build_http_pool, build_minio_client
+from .config import SyncConfig, load_config
+from .sync import sync_down, sync_up
+
+
+@dataclass
+class DaemonJob:
+    name: str
+    config: str
+    direction: str = "up"
+    mirror: bool = False
+    interval: int = 0
+    daily_time: str = ""  # HH:MM
+
+
+@dataclass
+class DaemonConfig:
+    workers: int = 16
+    max_parallel_jobs: int = 4
+    jobs: List[DaemonJob] = field(default_factory=list)
+
+
+def parse_daily_time(value: str) -> Tuple[int, int]:
+    hh, mm = value.strip().split(":")
+    hour, minute = int(hh), int(mm)
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise ValueError(f"时间格式应为 HH:MM: {value}")
+    return hour, minute
+
+
+def load_daemon_config(path: str) -> DaemonConfig:
+    with open(path, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+    base_dir = os.path.dirname(os.path.abspath(path))
+    jobs: List[DaemonJob] = []
+    for i, item in enumerate(data.get("jobs", []) or []):
+        config_path = str(item.get("config", ""))
+        if not config_path:
+            raise ValueError(f"jobs[{i}] 缺少 config")
+        if not os.path.isabs(config_path):
+            config_path = os.path.join(base_dir, config_path)
+        job = DaemonJob(
+            name=str(item.get("name") or os.path.splitext(os.path.basename(config_path))[0]),
+            config=config_path,
+            direction=str(item.get("direction", "up")),
+            mirror=bool(item.get("mirror", False)),
+            interval=int(item.get("interval", 0)),
+            daily_time=str(item.get("daily_time", "") or ""),
+        )
+        if job.direction not in ("up", "down"):
+            raise ValueError(f"任务 {job.name}: direction 只能是 up 或 down")
+        if job.interval <= 0 and not job.daily_time:
+            raise ValueError(f"任务 {job.name}: 需要设置 interval 或 daily_time")
+        if job.daily_time:
+            parse_daily_time(job.daily_time)
+        # async 引擎每次运行自建事件循环、连接器和线程池，无法共享 daemon 的线程预算与连接池
+        if load_config(job.config).engine != "thread":
+            raise ValueError(f"任务 {job.name}: daemon 只支持 engine: thread，请在该任务配置中去掉 engine: async")
+        jobs.append(job)
+    names = [j.name for j in jobs]
+    if len(set(names)) != len(names):
+        raise ValueError("任务名称 name 不能重复")
+    return DaemonConfig(
+        workers=max(1, int(data.get("workers", 16))),
+        max_parallel_jobs=max(1, int(data.get("max_parallel_jobs", 4))),
+        jobs=jobs,
+    )
+
+
+class _Lane:
+    def __init__(self, owner: "FairExecutor", name: str, limit: int) -> None:
+        self.owner = owner
+        self.name = name
+        self.limit = max(1, limit)
+        self.running = 0
+        self.queue: Deque[Tuple[concurrent.futures.Future, Callable, tuple]] = deque()
+
+    def submit(self, fn: Callable, *args) -> concurrent.futures.Future:
+        return self.owner._submit(self, fn, args)
+
+
+class FairExecutor:
+    """所有任务共享的传输线程池。
+
+    每个任务一条 lane（队列），空闲线程在各 lane 之间轮转取任务，
+    避免大任务占满线程导致小任务饿死；每条 lane 的并发不超过该任务的 concurrency。
+    """
+
+    def __init__(self, workers: int) -> None:
+        self._cond = threading.Condition()
+        self._lanes: Deque[_Lane] = deque()
+        self._shutdown = False
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"miniosync-worker-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for t in self._threads:
+            t.start()
+
+    def lane(self, name: str, limit: int) -> _Lane:
+        with self._cond:
+            lane = _Lane(self, name, limit)
+            self._lanes.append(lane)
+            return lane
+
+    def _submit(self, lane: _Lane, fn: Callable, args: tuple) -> concurrent.futures.Future:
+        fut: concurrent.futures.Future = concurrent.futures.Future()
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("executor 已关闭")
+            lane.queue.append((fut, fn, args))
+            self._cond.notify()
+        return fut
+
+    def _next(self) -> Optional[Tuple[_Lane, Tuple[concurrent.futures.Future, Callable, tuple]]]:
+        for _ in range(len(self._lanes)):
+            lane = self._lanes[0]
+            self._lanes.rotate(-1)
+            if lane.queue and lane.running < lane.limit:
+                lane.running += 1
+                return lane, lane.queue.popleft()
+        return None
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    if self._shutdown:
+                        return
+                    task = self._next()
+                    if task is not None:
+                        break
+                    self._cond.wait()
+            lane, (fut, fn, args) = task
+            if fut.set_running_or_notify_cancel():
+                try:
+                    fut.set_result(fn(*args))
+                except BaseException as e:
+                    fut.set_exception(e)
+            with self._cond:
+                lane.running -= 1
+                # lane 从满载变为可用时，可能有等待中的线程能取到它的任务
+                self._cond.notify_all()
+
+    def shutdown(self) -> None:
+        with self._cond:
+            self._shutdown = True
+            for lane in self._lanes:
+                while lane.queue:
+                    fut = lane.queue.popleft()[0]
+                    # 只 cancel() 会停留在 CANCELLED 状态，as_completed/wait 不会返回；
+                    # 需要再通知等待者，让正在收集结果的任务能结束
+                    fut.cancel()
+                    fut.set_running_or_notify_cancel()
+            self._cond.notify_all()
+        for t in self._threads:
+            t.join()
+
+
+class ClientPool:
+    """按 endpoint 共享 HTTP 连接池，按 endpoint + 凭证共享 Minio 客户端。"""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._pools: Dict[Tuple[str, bool], object] = {}
+        self._clients: Dict[Tuple[str, bool, str, str], Minio] = {}
+
+    def get(self, cfg: SyncConfig) -> Minio:
+        key = (cfg.endpoint, cfg.secure, cfg.access_key, cfg.secret_key)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                pool = self._pools.get((cfg.endpoint, cfg.secure))
+                if pool is None:
+                    pool = build_http_pool(self.maxsize)
+                    self._pools[(cfg.endpoint, cfg.secure)] = pool
+                client = build_minio_client(cfg.endpoint, cfg.access_key, cfg.secret_key, cfg.secure, http_client=pool)
+                self._clients[key] = client
+            return client
+
+
+def _run_job(job: DaemonJob, cfg: SyncConfig, clients: ClientPool, lane: _Lane) -> None:
+    try:
+        client = clients.get(cfg)
+        if job.direction == "up":
+            sync_up(cfg, client=client, executor=lane, label=job.name)
+        else:
+            sync_down(cfg, client=client, executor=lane, label=job.name)
+    except Exception as e:
+        print(f"[{job.name}] Error during sync: {e}")
+
+
+def run_daemon(dcfg: DaemonConfig) -> None:
+    if not dcfg.jobs:
+        raise ValueError("daemon 配置中没有任务")
+    executor = FairExecutor(dcfg.workers)
+    # 传输线程之外，列举与 ensure_bucket 还会在调度线程中占用连接
+    clients = ClientPool(dcfg.workers + dcfg.max_parallel_jobs)
+    scheduler = BackgroundScheduler(
+        executors={"default": SchedulerThreadPool(dcfg.max_parallel_jobs)},
+        job_defaults={"coalesce": True, "max_instances": 1, "misfire_grace_time": None},
+    )
+    for job in dcfg.jobs:
+        cfg = load_config(job.config)
+        if job.mirror:
+            cfg.delete_extraneous = True
+        lane = executor.lane(job.name, cfg.concurrency)
+        args = (job, cfg, clients, lane)
+        if job.daily_time:
+            hh, mm = parse_daily_time(job.daily_time)
+            scheduler.add_job(_run_job, "cron", hour=hh, minute=mm, args=args, id=job.name)
+        else:
+            # 与 --watch 一致：启动后立即执行一次，之后按间隔轮询
+            scheduler.add_job(
+                _run_job, "interval", seconds=max(1, job.interval), args=args, id=job.name, next_run_time=datetime.now()
+            )
+    scheduler.start()
+    print(f"Daemon started: {len(dcfg.jobs)} jobs, {dcfg.workers} workers")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scheduler.shutdown(wait=False)
+        executor.shutdown()
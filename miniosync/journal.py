@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+
+class SyncJournal:
+    """追加写入的完成记录，用于中断后续传时跳过已完成的对象。
+
+    每行一个 JSON：{"mode": "up"/"down", "key": 相对路径, "fp": 指纹}。
+    指纹变化（本地文件被修改或远端 ETag 变化）时记录失效，会重新传输。
+    """
+
+    def __init__(self, path: str, mode: str) -> None:
+        self.path = path
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._done: Dict[str, str] = {}
+        self._others: List[str] = []
+        self._fh = None
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.isfile(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    # 进程中断时最后一行可能只写了一半
+                    continue
+                if rec.get("mode") == self.mode:
+                    self._done[str(rec.get("key", ""))] = str(rec.get("fp", ""))
+                else:
+                    self._others.append(line.rstrip("\n"))
+
+    def is_done(self, key: str, fingerprint: str) -> bool:
+        return self._done.get(key) == fingerprint
+
+    def record(self, key: str, fingerprint: str) -> None:
+        line = json.dumps({"mode": self.mode, "key": key, "fp": fingerprint}, ensure_ascii=False)
+        with self._lock:
+            if self._fh is None:
+                parent = os.path.dirname(self.path)
+                if parent:
+                    os.makedirs(parent, exist_ok=True)
+                self._fh = open(self.path, "a", encoding="utf-8")
+            self._fh.write(line + "\n")
+            self._fh.flush()
+            self._done[key] = fingerprint
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+    def clear(self) -> None:
+        # 一轮同步全部成功后清空本方向的记录，避免日志无限增长
+        self.close()
+        with self._lock:
+            self._done.clear()
+            try:
+                if self._others:
+                    with open(self.path, "w", encoding="utf-8") as f:
+                        f.write("\n".join(self._others) + "\n")
+                else:
+                    os.remove(self.path)
+            except OSError:
+                pass
+
+
+def open_journal(path: str, mode: str) -> Optional[SyncJournal]:
+    if not path:
+        return None
+    return SyncJournal(path, mode)
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import uuid
+from typing import Dict, Iterable, List, Tuple
+
+from .client import iter_objects
+from .config import SyncConfig
+from .utils import match_globs, to_posix_key
+
+
+def shard_unit(rel_posix: str, depth: int) -> str:
+    # 深度 depth 以内的目录作为整体分配，这样各 worker 只需遍历/列举自己的子树；
+    # depth 为 0 时按完整路径分配（最均匀，但每个 worker 都要遍历全部文件）
+    if depth <= 0:
+        return rel_posix
+    parts = rel_posix.split("/")
+    if len(parts) > depth:
+        return "/".join(parts[:depth])
+    return rel_posix
+
+
+def shard_of(rel_posix: str, count: int, depth: int) -> int:
+    if count <= 1:
+        return 0
+    # 不能用内置 hash()：它在不同进程间不稳定
+    digest = hashlib.md5(shard_unit(rel_posix, depth).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count
+
+
+def is_sharded(cfg: SyncConfig) -> bool:
+    return cfg.shard_count > 1
+
+
+def owns(cfg: SyncConfig, rel_posix: str) -> bool:
+    return shard_of(rel_posix, cfg.shard_count, cfg.shard_depth) == cfg.shard_index
+
+
+def shard_label(cfg: SyncConfig) -> str:
+    return f"shard-{cfg.shard_index}-of-{cfg.shard_count}"
+
+
+def shard_journal_path(cfg: SyncConfig) -> str:
+    # 同机多个 worker 共用一个 journal_path 时互不覆盖
+    if not cfg.journal_path or not is_sharded(cfg):
+        return cfg.journal_path
+    return f"{cfg.journal_path}.{shard_label(cfg)}"
+
+
+def walk_shard_files(cfg: SyncConfig) -> Iterable[Tuple[str, str]]:
+    base_dir_abs = os.path.abspath(cfg.local_dir)
+    depth = cfg.shard_depth
+    for root, dirs, files in os.walk(base_dir_abs):
+        rel_root = to_posix_key(os.path.relpath(root, base_dir_abs))
+        rel_root = "" if rel_root == "." else rel_root
+        level = rel_root.count("/") + 1 if rel_root else 0
+        if depth > 0 and level == depth - 1:
+            # 下一层目录就是分片单位，不属于本分片的整棵子树直接剪掉
+            dirs[:] = [d for d in dirs if owns(cfg, f"{rel_root}/{d}" if rel_root else d)]
+        check_files = depth <= 0 or level < depth
+        for name in files:
+            rel_posix = f"{rel_root}/{name}" if rel_root else name
+            if check_files and not owns(cfg, rel_posix):
+                continue
+            if match_globs(rel_posix, cfg.include, cfg.exclude):
+                yield os.path.join(root, name), rel_posix
+
+
+def iter_shard_objects(client, cfg: SyncConfig) -> Iterable:
+    if cfg.shard_depth <= 0:
+        for obj in iter_objects(client, cfg.bucket, cfg.prefix):
+            if owns(cfg, obj.object_name[len(cfg.prefix):]):
+                yield obj
+        return
+
+    def visit(prefix: str, level: int) -> Iterable:
+        # depth 以内逐层非递归列举，到达分片单位后只递归列举属于本分片的前缀
+        for obj in client.list_objects(cfg.bucket, prefix=prefix, recursive=False):
+            rel = obj.object_name[len(cfg.prefix):]
+            if obj.is_dir:
+                if level + 1 >= cfg.shard_depth:
+                    if owns(cfg, rel.rstrip("/")):
+                        yield from iter_objects(client, cfg.bucket, obj.object_name)
+                else:
+                    yield from visit(obj.object_name, level + 1)
+            elif owns(cfg, rel):
+                yield obj
+
+    yield from visit(cfg.prefix, 0)
+
+
+def write_shard_report(cfg: SyncConfig, report: Dict) -> str:
+    os.makedirs(cfg.report_dir, exist_ok=True)
+    path = os.path.join(cfg.report_dir, f"{shard_label(cfg)}.json")
+    data = dict(report, shard_index=cfg.shard_index, shard_count=cfg.shard_count, run_id=cfg.run_id)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, path)
+    return path
+
+
+def load_shard_reports(report_dir: str) -> List[Dict]:
+    # 按写入时间排序，最后一个是最新的一次运行
+    reports = []
+    paths = glob.glob(os.path.join(report_dir, "shard-*-of-*.json"))
+    for path in sorted(paths, key=os.path.getmtime):
+        with open(path, "r", encoding="utf-8") as f:
+            reports.append(json.load(f))
+    return reports
+
+
+def summarize_shard_reports(report_dir: str, run_id: str = "") -> int:
+    reports = load_shard_reports(report_dir)
+    if reports and not run_id:
+        # 未指定时以最新一次运行为准
+        run_id = str(reports[-1].get("run_id", ""))
+    # 某个 worker 在写结果前崩溃时，目录里还留着它上一次运行的结果，不能计入本次
+    reports = [r for r in reports if str(r.get("run_id", "")) == run_id]
+    if not reports:
+        print(f"No shard reports for run '{run_id}' in {report_dir}")
+        return 1
+    # 目录中可能残留分片数不同的旧结果，以最新一次运行的分片数为准
+    count = int(reports[-1].get("shard_count", 1))
+    seen = set()
+    totals = {"transferred": 0, "skipped": 0, "deleted": 0, "failed": 0}
+    for r in sorted(reports, key=lambda r: int(r.get("shard_index", 0))):
+        if int(r.get("shard_count", 1)) != count:
+            continue
+        seen.add(int(r.get("shard_index", 0)))
+        failed = len(r.get("failures", []))
+        print(
+            f"Shard {r.get('shard_index')}/{count} ({r.get('direction')}): "
+            f"Transferred: {r.get('transferred', 0)}, Skipped: {r.get('skipped', 0)}, "
+            f"Deleted: {r.get('deleted', 0)}, Failed: {failed}"
+        )
+        totals["transferred"] += int(r.get("transferred", 0))
+        totals["skipped"] += int(r.get("skipped", 0))
+        totals["deleted"] += int(r.get("deleted", 0))
+        totals["failed"] += failed
+    missing = sorted(set(range(count)) - seen)
+    print(
+        f"Total: Transferred: {totals['transferred']}, Skipped: {totals['skipped']}, "
+        f"Deleted: {totals['deleted']}, Failed: {totals['failed']}"
+    )
+    if missing:
+        print(f"Missing shards (run '{run_id}'): {', '.join(str(i) for i in missing)}")
+    return 1 if missing or totals["failed"] else 0
+
+
+def parse_shard_spec(spec: str) -> Tuple[int, int]:
+    try:
+        index, count = (int(x) for x in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"分片格式应为 I/N，例如 0/8: {spec}")
+    if count < 1 or not (0 <= index < count):
+        raise ValueError(f"分片序号应在 [0, N) 内: {spec}")
+    return index, count
+
+
+def new_run_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def spawn_local_shards(direction: str, config_path: str, count: int, report_dir: str, extra_args: List[str]) -> int:
+    # 在本机启动 count 个 worker 进程，各自处理一个分片，结束后汇总
+    os.makedirs(report_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(report_dir, "shard-*-of-*.json")):
+        os.remove(path)
+    run_id = new_run_id()
+    procs = []
+    for i in range(count):
+        cmd = [
+            sys.executable, "-m", "miniosync", "sync", direction,
+            "--config", config_path,
+            "--shard", f"{i}/{count}",
+            "--report-dir", report_dir,
+            "--run-id", run_id,
+        ] + extra_args
+        procs.append(subprocess.Popen(cmd))
+    for proc in procs:
+        proc.wait()
+    return summarize_shard_reports(report_dir, run_id)
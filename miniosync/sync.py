@@ -3,23 +3,50 @@ from __future__ import annotations
 import concurrent.futures
 import os
 import time
-from typing import Dict, Iterable, List, Tuple
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
 
 from minio.commonconfig import REPLACE
 from minio.datatypes import Object
 
-from .client import build_minio_client, ensure_bucket, iter_objects, remove_objects
+from .client import build_minio_client, call_with_retry, ensure_bucket, iter_objects, remove_objects
 from .config import SyncConfig
+from .journal import SyncJournal, open_journal
+from .shard import is_sharded, iter_shard_objects, shard_journal_path, shard_label, walk_shard_files, write_shard_report
 from .utils import compute_md5_hex, to_posix_key, walk_local_files
 
+T = TypeVar("T")
+
+
+@dataclass
+class SyncResult:
+    direction: str
+    transferred: int = 0
+    skipped: int = 0
+    deleted: int = 0
+    failures: List[Tuple[str, str]] = field(default_factory=list)
+
 
 def _object_etag(obj: Object) -> str:
     return (obj.etag or "").replace('"', "")
 
 
+def _walk(cfg: SyncConfig) -> Iterable[Tuple[str, str]]:
+    # 日志文件放在同步目录内时不参与同步
+    if is_sharded(cfg):
+        files = walk_shard_files(cfg)
+    else:
+        files = walk_local_files(cfg.local_dir, cfg.include, cfg.exclude)
+    for full, rel in files:
+        if cfg.journal_path and (full == cfg.journal_path or full.startswith(cfg.journal_path + ".shard-")):
+            continue
+        yield full, rel
+
+
 def build_remote_index(client, cfg: SyncConfig) -> Dict[str, Tuple[str, int]]:
     index: Dict[str, Tuple[str, int]] = {}
-    for obj in iter_objects(client, cfg.bucket, cfg.prefix):
+    objects = iter_shard_objects(client, cfg) if is_sharded(cfg) else iter_objects(client, cfg.bucket, cfg.prefix)
+    for obj in objects:
         if obj.is_dir:
             continue
         key = obj.object_name
@@ -28,46 +55,113 @@ def build_remote_index(client, cfg: SyncConfig) -> Dict[str, Tuple[str, int]]:
     return index
 
 
-def upload_missing_and_changed(client, cfg: SyncConfig, remote_index: Dict[str, Tuple[str, int]]) -> Tuple[int, int]:
-    uploaded = 0
+def _local_fingerprint(local_path: str) -> str:
+    try:
+        st = os.stat(local_path)
+    except OSError:
+        return ""
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def _collect(futures: Dict[concurrent.futures.Future, str]) -> Tuple[int, int, List[Tuple[str, str]]]:
+    done = 0
     skipped = 0
+    failures: List[Tuple[str, str]] = []
+    for fut in concurrent.futures.as_completed(futures):
+        try:
+            if fut.result():
+                done += 1
+            else:
+                skipped += 1
+        except concurrent.futures.CancelledError:
+            # 共享线程池关闭时排队中的对象被取消
+            failures.append((futures[fut], "cancelled"))
+        except Exception as e:
+            # 单个对象失败不影响其它对象，统一在结束时汇报
+            failures.append((futures[fut], f"{type(e).__name__}: {e}"))
+    return done, skipped, failures
+
+
+def _run_parallel(
+    cfg: SyncConfig,
+    fn: Callable[[T], bool],
+    items: List[T],
+    key: Callable[[T], str],
+    executor=None,
+) -> Tuple[int, int, List[Tuple[str, str]]]:
+    # executor 由外部传入时（如 daemon 的共享线程池）复用之，否则本次同步独占一个线程池
+    if executor is not None:
+        return _collect({executor.submit(fn, it): key(it) for it in items})
+    with concurrent.futures.ThreadPoolExecutor(max_workers=cfg.concurrency) as ex:
+        return _collect({ex.submit(fn, it): key(it) for it in items})
+
+
+def _report(result: SyncResult, cfg: SyncConfig, label: str) -> None:
+    if not label and is_sharded(cfg):
+        label = shard_label(cfg)
+    prefix = f"[{label}] " if label else ""
+    verb = "Uploaded" if result.direction == "up" else "Downloaded"
+    print(
+        f"{prefix}{verb}: {result.transferred}, Skipped: {result.skipped}, "
+        f"Deleted: {result.deleted}, Failed: {len(result.failures)}"
+    )
+    limit = 20
+    for rel, err in result.failures[:limit]:
+        print(f"{prefix}  Failed: {rel}: {err}")
+    if len(result.failures) > limit:
+        print(f"{prefix}  ... and {len(result.failures) - limit} more")
+    if cfg.report_dir:
+        write_shard_report(cfg, asdict(result))
 
-    def need_upload(local_path: str, rel_posix: str) -> bool:
-        if rel_posix not in remote_index:
+
+def need_upload(cfg: SyncConfig, remote_index: Dict[str, Tuple[str, int]], local_path: str, rel_posix: str) -> bool:
+    if rel_posix not in remote_index:
+        return True
+    remote_etag, remote_size = remote_index[rel_posix]
+    if not cfg.etag_by_content:
+        try:
+            local_size = os.path.getsize(local_path)
+        except OSError:
             return True
-        remote_etag, remote_size = remote_index[rel_posix]
-        if not cfg.etag_by_content:
-            try:
-                local_size = os.path.getsize(local_path)
-            except OSError:
-                return True
-            if local_size != remote_size:
-                return True
-            return False
-        local_md5 = compute_md5_hex(local_path)
-        return local_md5 != remote_etag
+        if local_size != remote_size:
+            return True
+        return False
+    local_md5 = compute_md5_hex(local_path)
+    return local_md5 != remote_etag
+
+
+def upload_missing_and_changed(
+    client,
+    cfg: SyncConfig,
+    remote_index: Dict[str, Tuple[str, int]],
+    journal: Optional[SyncJournal] = None,
+    executor=None,
+) -> Tuple[int, int, List[Tuple[str, str]]]:
+    if cfg.engine == "async":
+        # 延迟导入：aiohttp 只在使用 async 引擎时需要
+        from .aio import upload_missing_and_changed_async
+
+        return upload_missing_and_changed_async(client, cfg, remote_index, journal)
 
     def do_upload(item: Tuple[str, str]) -> bool:
         local_path, rel_posix = item
-        if not need_upload(local_path, rel_posix):
+        fingerprint = _local_fingerprint(local_path)
+        if journal is not None and journal.is_done(rel_posix, fingerprint):
+            return False
+        if not need_upload(cfg, remote_index, local_path, rel_posix):
             return False
         object_name = cfg.prefix + rel_posix if cfg.prefix else rel_posix
-        client.fput_object(cfg.bucket, object_name, local_path)
+        call_with_retry(lambda: client.fput_object(cfg.bucket, object_name, local_path), cfg.retries, cfg.retry_backoff)
+        if journal is not None:
+            journal.record(rel_posix, fingerprint)
         return True
 
-    items = list(walk_local_files(cfg.local_dir, cfg.include, cfg.exclude))
-    with concurrent.futures.ThreadPoolExecutor(max_workers=cfg.concurrency) as ex:
-        futures = [ex.submit(do_upload, it) for it in items]
-        for fut in concurrent.futures.as_completed(futures):
-            if fut.result():
-                uploaded += 1
-            else:
-                skipped += 1
-    return uploaded, skipped
+    items = list(_walk(cfg))
+    return _run_parallel(cfg, do_upload, items, lambda it: it[1], executor)
 
 
 def delete_remote_extraneous(client, cfg: SyncConfig, remote_index: Dict[str, Tuple[str, int]]) -> int:
-    wanted: Dict[str, None] = {rel for _, rel in walk_local_files(cfg.local_dir, cfg.include, cfg.exclude)}
+    wanted: Dict[str, None] = {rel for _, rel in _walk(cfg)}
     extraneous = []
     for rel in remote_index.keys():
         if rel not in wanted:
@@ -78,16 +172,26 @@ def delete_remote_extraneous(client, cfg: SyncConfig, remote_index: Dict[str, Tu
     return len(extraneous)
 
 
-def sync_up(cfg: SyncConfig) -> None:
-    client = build_minio_client(cfg.endpoint, cfg.access_key, cfg.secret_key, cfg.secure)
+def sync_up(cfg: SyncConfig, client=None, executor=None, label: str = "") -> SyncResult:
+    if client is None:
+        client = build_minio_client(cfg.endpoint, cfg.access_key, cfg.secret_key, cfg.secure)
     ensure_bucket(client, cfg.bucket)
     remote_index = build_remote_index(client, cfg)
-    uploaded, skipped = upload_missing_and_changed(client, cfg, remote_index)
+    journal = open_journal(shard_journal_path(cfg), "up")
+    try:
+        uploaded, skipped, failures = upload_missing_and_changed(client, cfg, remote_index, journal, executor)
+    finally:
+        if journal is not None:
+            journal.close()
     deleted = 0
     if cfg.delete_extraneous:
         remote_index = build_remote_index(client, cfg)
         deleted = delete_remote_extraneous(client, cfg, remote_index)
-    print(f"Uploaded: {uploaded}, Skipped: {skipped}, Deleted: {deleted}")
+    if journal is not None and not failures:
+        journal.clear()
+    result = SyncResult("up", uploaded, skipped, deleted, failures)
+    _report(result, cfg, label)
+    return result
 
 
 def ensure_local_dir(path: str) -> None:
@@ -95,48 +199,55 @@ def ensure_local_dir(path: str) -> None:
         os.makedirs(path, exist_ok=True)
 
 
-def download_missing_and_changed(client, cfg: SyncConfig, remote_index: Dict[str, Tuple[str, int]]) -> Tuple[int, int]:
-    downloaded = 0
-    skipped = 0
-
-    def need_download(rel: str, etag: str, size: int) -> bool:
-        local_path = os.path.join(cfg.local_dir, rel.replace("/", os.sep))
-        if not os.path.exists(local_path):
+def need_download(cfg: SyncConfig, rel: str, etag: str, size: int) -> bool:
+    local_path = os.path.join(cfg.local_dir, rel.replace("/", os.sep))
+    if not os.path.exists(local_path):
+        return True
+    if not cfg.etag_by_content:
+        try:
+            local_size = os.path.getsize(local_path)
+        except OSError:
             return True
-        if not cfg.etag_by_content:
-            try:
-                local_size = os.path.getsize(local_path)
-            except OSError:
-                return True
-            return local_size != size
-        local_md5 = compute_md5_hex(local_path)
-        return local_md5 != etag
+        return local_size != size
+    local_md5 = compute_md5_hex(local_path)
+    return local_md5 != etag
+
+
+def download_missing_and_changed(
+    client,
+    cfg: SyncConfig,
+    remote_index: Dict[str, Tuple[str, int]],
+    journal: Optional[SyncJournal] = None,
+    executor=None,
+) -> Tuple[int, int, List[Tuple[str, str]]]:
+    if cfg.engine == "async":
+        from .aio import download_missing_and_changed_async
+
+        return download_missing_and_changed_async(client, cfg, remote_index, journal)
 
     def do_download(item: Tuple[str, Tuple[str, int]]) -> bool:
         rel, (etag, size) = item
-        if not need_download(rel, etag, size):
-            return False
         object_name = cfg.prefix + rel if cfg.prefix else rel
         local_path = os.path.join(cfg.local_dir, rel.replace("/", os.sep))
+        fingerprint = f"{etag}:{size}"
+        if journal is not None and journal.is_done(rel, fingerprint) and os.path.exists(local_path):
+            return False
+        if not need_download(cfg, rel, etag, size):
+            return False
         os.makedirs(os.path.dirname(local_path), exist_ok=True)
-        client.fget_object(cfg.bucket, object_name, local_path)
+        call_with_retry(lambda: client.fget_object(cfg.bucket, object_name, local_path), cfg.retries, cfg.retry_backoff)
+        if journal is not None:
+            journal.record(rel, fingerprint)
         return True
 
     items = list(remote_index.items())
-    with concurrent.futures.ThreadPoolExecutor(max_workers=cfg.concurrency) as ex:
-        futures = [ex.submit(do_download, it) for it in items]
-        for fut in concurrent.futures.as_completed(futures):
-            if fut.result():
-                downloaded += 1
-            else:
-                skipped += 1
-    return downloaded, skipped
+    return _run_parallel(cfg, do_download, items, lambda it: it[0], executor)
 
 
 def delete_local_extraneous(cfg: SyncConfig, remote_index: Dict[str, Tuple[str, int]]) -> int:
     wanted = set(remote_index.keys())
     extraneous = []
-    for full, rel in walk_local_files(cfg.local_dir, cfg.include, cfg.exclude):
+    for full, rel in _walk(cfg):
         if rel not in wanted:
             extraneous.append(full)
     for p in extraneous:
@@ -147,15 +258,25 @@ def delete_local_extraneous(cfg: SyncConfig, remote_index: Dict[str, Tuple[str,
     return len(extraneous)
 
 
-def sync_down(cfg: SyncConfig) -> None:
-    client = build_minio_client(cfg.endpoint, cfg.access_key, cfg.secret_key, cfg.secure)
+def sync_down(cfg: SyncConfig, client=None, executor=None, label: str = "") -> SyncResult:
+    if client is None:
+        client = build_minio_client(cfg.endpoint, cfg.access_key, cfg.secret_key, cfg.secure)
     ensure_local_dir(cfg.local_dir)
     remote_index = build_remote_index(client, cfg)
-    downloaded, skipped = download_missing_and_changed(client, cfg, remote_index)
+    journal = open_journal(shard_journal_path(cfg), "down")
+    try:
+        downloaded, skipped, failures = download_missing_and_changed(client, cfg, remote_index, journal, executor)
+    finally:
+        if journal is not None:
+            journal.close()
     deleted = 0
     if cfg.delete_extraneous:
         deleted = delete_local_extraneous(cfg, remote_index)
-    print(f"Downloaded: {downloaded}, Skipped: {skipped}, Deleted: {deleted}")
+    if journal is not None and not failures:
+        journal.clear()
+    result = SyncResult("down", downloaded, skipped, deleted, failures)
+    _report(result, cfg, label)
+    return result
 
 
 def watch_loop(mode: str, cfg: SyncConfig, interval: int) -> None:
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import asyncio
+import os
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from miniosync import aio  # noqa: E402
+from miniosync.aio import LARGE_OBJECT_SIZE, AsyncS3Error, _ByteBudget, _is_retryable, _run_workers  # noqa: E402
+from miniosync.client import build_minio_client  # noqa: E402
+from miniosync.config import SyncConfig  # noqa: E402
+from miniosync.sync import sync_down, sync_up  # noqa: E402
+
+SMALL_KEYS = [
+    "space name.txt",
+    "plus+sign.txt",
+    "amp&ersand.txt",
+    "percent%20.txt",
+    "中文/文件 名.txt",
+    "nested/dir/tilde~.txt",
+]
+LARGE_KEY = "large/big.bin"
+
+
+def _cfg(endpoint: str, bucket: str, local_dir: str, **kwargs) -> SyncConfig:
+    cfg = SyncConfig(
+        endpoint, False, "test", "testtest", bucket,
+        prefix="p/", local_dir=local_dir, include=["*"],
+        engine="async", async_concurrency=16, retry_backoff=0, **kwargs,
+    )
+    cfg.normalize()
+    return cfg
+
+
+def _make_tree(base: str) -> dict:
+    contents = {}
+    for i, rel in enumerate(SMALL_KEYS):
+        contents[rel] = f"{rel}:{i}".encode("utf-8") * (i + 1)
+    contents[LARGE_KEY] = os.urandom(LARGE_OBJECT_SIZE + 4096)
+    for rel, data in contents.items():
+        path = os.path.join(base, *rel.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+    return contents
+
+
+def _read_tree(base: str) -> dict:
+    out = {}
+    for root, _, files in os.walk(base):
+        for name in files:
+            full = os.path.join(root, name)
+            with open(full, "rb") as f:
+                out[os.path.relpath(full, base).replace(os.sep, "/")] = f.read()
+    return out
+
+
+def _count_calls(monkeypatch, name: str) -> list:
+    calls = []
+    original = getattr(aio.AsyncS3Client, name)
+
+    async def wrapper(self, bucket, key, *args):
+        calls.append(key)
+        return await original(self, bucket, key, *args)
+
+    monkeypatch.setattr(aio.AsyncS3Client, name, wrapper)
+    return calls
+
+
+def test_async_round_trip_with_awkward_keys(tmp_path, s3_endpoint, monkeypatch):
+    src = str(tmp_path / "src")
+    dst = str(tmp_path / "dst")
+    contents = _make_tree(src)
+    puts = _count_calls(monkeypatch, "put_object")
+    gets = _count_calls(monkeypatch, "get_object")
+
+    up = sync_up(_cfg(s3_endpoint, "aio-round-trip", src))
+    assert up.transferred == len(contents) and not up.failures
+    # 小对象走异步客户端，大对象交给 minio 客户端
+    assert sorted(puts) == sorted("p/" + rel for rel in SMALL_KEYS)
+
+    client = build_minio_client(s3_endpoint, "test", "testtest", False)
+    remote = sorted(o.object_name for o in client.list_objects("aio-round-trip", prefix="p/", recursive=True))
+    assert remote == sorted("p/" + rel for rel in contents)
+
+    down = sync_down(_cfg(s3_endpoint, "aio-round-trip", dst))
+    assert down.transferred == len(contents) and not down.failures
+    assert sorted(gets) == sorted("p/" + rel for rel in SMALL_KEYS)
+    assert _read_tree(dst) == contents
+
+    again = sync_up(_cfg(s3_endpoint, "aio-round-trip", src))
+    assert again.transferred == 0 and again.skipped == len(contents)
+
+
+def test_async_failure_is_isolated_and_retryable_errors_retried(tmp_path, s3_endpoint, monkeypatch):
+    src = str(tmp_path / "src")
+    _make_tree(src)
+    calls = {}
+    original = aio.AsyncS3Client.put_object
+
+    async def flaky(self, bucket, key, *args):
+        calls[key] = calls.get(key, 0) + 1
+        if key == "p/plus+sign.txt":
+            raise AsyncS3Error("AccessDenied", 403, "denied")
+        if key == "p/space name.txt" and calls[key] == 1:
+            raise AsyncS3Error("SlowDown", 503, "slow down")
+        return await original(self, bucket, key, *args)
+
+    monkeypatch.setattr(aio.AsyncS3Client, "put_object", flaky)
+    result = sync_up(_cfg(s3_endpoint, "aio-failures", src))
+
+    assert [rel for rel, _ in result.failures] == ["plus+sign.txt"]
+    assert "AccessDenied" in result.failures[0][1]
+    assert result.transferred == len(SMALL_KEYS)
+    assert calls["p/plus+sign.txt"] == 1
+    assert calls["p/space name.txt"] == 2
+
+
+def test_is_retryable():
+    assert _is_retryable(AsyncS3Error("SlowDown", 503, ""))
+    assert _is_retryable(AsyncS3Error("", 500, ""))
+    assert _is_retryable(AsyncS3Error("", 429, ""))
+    assert _is_retryable(asyncio.TimeoutError())
+    assert not _is_retryable(AsyncS3Error("AccessDenied", 403, ""))
+    assert not _is_retryable(AsyncS3Error("NoSuchKey", 404, ""))
+    assert not _is_retryable(FileNotFoundError())
+
+
+def test_byte_budget_never_exceeds_limit():
+    async def main() -> int:
+        budget = _ByteBudget(100)
+        peak = 0
+
+        async def use(n: int) -> None:
+            nonlocal peak
+            held = await budget.acquire(n)
+            peak = max(peak, budget.used)
+            assert budget.used <= budget.limit
+            await asyncio.sleep(0.001)
+            await budget.release(held)
+
+        await asyncio.gather(*(use(n) for n in [30, 70, 40, 100, 250, 10] * 10))
+        assert budget.used == 0
+        return peak
+
+    assert asyncio.run(main()) <= 100
+
+
+def test_run_workers_isolates_failures():
+    async def fn(i: int) -> bool:
+        await asyncio.sleep(0)
+        if i == 3:
+            raise ValueError("bad item")
+        return i % 2 == 0
+
+    done, skipped, failures = asyncio.run(_run_workers(list(range(10)), fn, str, 4))
+    assert (done, skipped) == (5, 4)
+    assert failures == [("3", "ValueError: bad item")]
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import pytest
+from minio.error import S3Error, ServerError
+
+from miniosync.client import call_with_retry, is_retryable_error
+
+
+def _s3_error(code: str) -> S3Error:
+    return S3Error(code, "message", "resource", "request-id", "host-id", None)
+
+
+class Failing:
+    def __init__(self, exc: BaseException, succeed_after: int = -1) -> None:
+        self.exc = exc
+        self.succeed_after = succeed_after
+        self.calls = 0
+
+    def __call__(self) -> str:
+        self.calls += 1
+        if self.calls == self.succeed_after:
+            return "ok"
+        raise self.exc
+
+
+def test_is_retryable_error():
+    assert is_retryable_error(_s3_error("SlowDown"))
+    assert is_retryable_error(ServerError("boom", 503))
+    assert is_retryable_error(ConnectionResetError())
+    assert not is_retryable_error(_s3_error("AccessDenied"))
+    assert not is_retryable_error(ServerError("bad", 400))
+    assert not is_retryable_error(FileNotFoundError())
+
+
+def test_retryable_error_is_retried_retries_times():
+    fn = Failing(_s3_error("SlowDown"))
+    with pytest.raises(S3Error):
+        call_with_retry(fn, retries=3, backoff=0)
+    assert fn.calls == 4
+
+
+def test_retry_stops_on_success():
+    fn = Failing(_s3_error("SlowDown"), succeed_after=2)
+    assert call_with_retry(fn, retries=3, backoff=0) == "ok"
+    assert fn.calls == 2
+
+
+@pytest.mark.parametrize("exc", [_s3_error("AccessDenied"), FileNotFoundError("missing")])
+def test_non_retryable_error_is_raised_immediately(exc):
+    fn = Failing(exc)
+    with pytest.raises(type(exc)):
+        call_with_retry(fn, retries=3, backoff=0)
+    assert fn.calls == 1
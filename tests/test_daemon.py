@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from miniosync.config import SyncConfig
+from miniosync.daemon import ClientPool, FairExecutor, load_daemon_config
+from miniosync.sync import sync_up
+
+
+class BlockingClient:
+    def __init__(self) -> None:
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def bucket_exists(self, bucket):
+        return True
+
+    def list_objects(self, bucket, prefix="", recursive=False):
+        return []
+
+    def fput_object(self, bucket, object_name, path):
+        self.started.set()
+        self.release.wait(timeout=10)
+
+
+def test_shutdown_while_job_in_progress(tmp_path):
+    data = tmp_path / "data" / "sub"
+    data.mkdir(parents=True)
+    for i in range(5):
+        (data / f"f{i}").write_text(str(i))
+    cfg = SyncConfig("127.0.0.1:9000", False, "a", "b", "bucket", local_dir=str(tmp_path / "data"))
+    cfg.normalize()
+
+    executor = FairExecutor(1)
+    client = BlockingClient()
+    results = []
+    lane = executor.lane("job", 1)
+    job = threading.Thread(target=lambda: results.append(sync_up(cfg, client=client, executor=lane)), daemon=True)
+    job.start()
+    assert client.started.wait(timeout=5)
+
+    stopper = threading.Thread(target=executor.shutdown)
+    stopper.start()
+    client.release.set()
+    stopper.join(timeout=5)
+    job.join(timeout=5)
+
+    assert not stopper.is_alive()
+    assert not job.is_alive()
+    result = results[0]
+    assert result.transferred == 1
+    assert [err for _, err in result.failures] == ["cancelled"] * 4
+
+
+def _write_job(tmp_path, engine: str) -> str:
+    (tmp_path / "job.yaml").write_text(f'bucket: "bucket"\nlocal_dir: "{tmp_path}"\nengine: {engine}\n', encoding="utf-8")
+    daemon_path = tmp_path / "daemon.yaml"
+    daemon_path.write_text("jobs:\n  - name: j\n    config: job.yaml\n    interval: 60\n", encoding="utf-8")
+    return str(daemon_path)
+
+
+def test_load_daemon_config_accepts_thread_engine(tmp_path):
+    dcfg = load_daemon_config(_write_job(tmp_path, "thread"))
+    assert [j.name for j in dcfg.jobs] == ["j"]
+
+
+def test_load_daemon_config_rejects_async_engine(tmp_path):
+    with pytest.raises(ValueError, match="engine"):
+        load_daemon_config(_write_job(tmp_path, "async"))
+
+
+def test_fair_executor_caps_lanes_and_round_robins():
+    executor = FairExecutor(4)
+    big = executor.lane("big", 4)
+    small = executor.lane("small", 1)
+    lock = threading.Lock()
+    running = {"big": 0, "small": 0}
+    peak = {"big": 0, "small": 0}
+    big_queued_when_small_started = []
+
+    def task(name: str) -> None:
+        with lock:
+            running[name] += 1
+            peak[name] = max(peak[name], running[name])
+            if name == "small":
+                big_queued_when_small_started.append(len(big.queue))
+        time.sleep(0.01)
+        with lock:
+            running[name] -= 1
+
+    futures = [big.submit(task, "big") for _ in range(40)]
+    futures += [small.submit(task, "small") for _ in range(5)]
+    for fut in futures:
+        fut.result(timeout=10)
+    executor.shutdown()
+
+    assert peak == {"big": 4, "small": 1}
+    # 小任务在大任务队列清空之前就轮到执行，没有被饿死
+    assert len(big_queued_when_small_started) == 5
+    assert all(n > 0 for n in big_queued_when_small_started)
+
+
+def _endpoint_cfg(endpoint: str, access_key: str) -> SyncConfig:
+    cfg = SyncConfig(endpoint, False, access_key, "secret-" + access_key, "bucket")
+    cfg.normalize()
+    return cfg
+
+
+def test_client_pool_shares_http_pool_per_endpoint():
+    clients = ClientPool(8)
+    a = clients.get(_endpoint_cfg("127.0.0.1:9000", "alice"))
+    b = clients.get(_endpoint_cfg("127.0.0.1:9000", "bob"))
+    other = clients.get(_endpoint_cfg("127.0.0.1:9001", "alice"))
+
+    assert a is not b
+    assert a._http is b._http
+    assert clients.get(_endpoint_cfg("127.0.0.1:9000", "alice")) is a
+    assert other._http is not a._http
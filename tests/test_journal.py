@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import json
+import os
+
+from minio.error import S3Error
+
+from miniosync.config import SyncConfig
+from miniosync.journal import SyncJournal
+from miniosync.sync import sync_up
+
+
+class FakeClient:
+    def __init__(self, fail=()) -> None:
+        self.fail = set(fail)
+        self.uploaded = []
+
+    def bucket_exists(self, bucket):
+        return True
+
+    def list_objects(self, bucket, prefix="", recursive=False):
+        return []
+
+    def fput_object(self, bucket, object_name, path):
+        if object_name in self.fail:
+            raise S3Error("AccessDenied", "denied", object_name, "request-id", "host-id", None)
+        self.uploaded.append(object_name)
+
+
+def _make_cfg(tmp_path, journal_path: str = "") -> SyncConfig:
+    data = tmp_path / "data"
+    data.mkdir(exist_ok=True)
+    for name in ("a.txt", "b.txt", "c.txt"):
+        (data / name).write_text(name)
+    cfg = SyncConfig(
+        "127.0.0.1:9000", False, "a", "b", "bucket",
+        local_dir=str(data), include=["*"], retry_backoff=0, journal_path=journal_path,
+    )
+    cfg.normalize()
+    return cfg
+
+
+def test_failing_object_does_not_stop_others(tmp_path):
+    cfg = _make_cfg(tmp_path)
+    client = FakeClient(fail={"b.txt"})
+    result = sync_up(cfg, client=client)
+    assert sorted(client.uploaded) == ["a.txt", "c.txt"]
+    assert result.transferred == 2
+    assert [rel for rel, _ in result.failures] == ["b.txt"]
+    assert "AccessDenied" in result.failures[0][1]
+
+
+def test_second_run_only_retries_failed_objects(tmp_path):
+    journal_path = str(tmp_path / "data" / ".journal")
+    cfg = _make_cfg(tmp_path, journal_path)
+
+    first = FakeClient(fail={"b.txt"})
+    sync_up(cfg, client=first)
+    # 日志位于 local_dir 内，但不应被当作普通文件上传
+    assert ".journal" not in first.uploaded
+    assert os.path.isfile(journal_path)
+
+    second = FakeClient()
+    result = sync_up(cfg, client=second)
+    assert second.uploaded == ["b.txt"]
+    assert result.skipped == 2
+    assert not result.failures
+    # 全部成功后日志被清空
+    assert not os.path.exists(journal_path)
+
+
+def test_modified_file_is_not_skipped(tmp_path):
+    journal_path = str(tmp_path / "journal.log")
+    cfg = _make_cfg(tmp_path, journal_path)
+    sync_up(cfg, client=FakeClient(fail={"c.txt"}))
+
+    (tmp_path / "data" / "a.txt").write_text("changed content")
+    client = FakeClient()
+    sync_up(cfg, client=client)
+    assert sorted(client.uploaded) == ["a.txt", "c.txt"]
+
+
+def test_truncated_last_line_is_ignored(tmp_path):
+    path = tmp_path / "journal.log"
+    good = json.dumps({"mode": "up", "key": "a.txt", "fp": "1:2"})
+    path.write_text(good + "\n" + '{"mode": "up", "key": "b.t', encoding="utf-8")
+    journal = SyncJournal(str(path), "up")
+    assert journal.is_done("a.txt", "1:2")
+    assert not journal.is_done("b.txt", "1:2")
+
+
+def test_clear_keeps_other_direction(tmp_path):
+    path = tmp_path / "journal.log"
+    down = json.dumps({"mode": "down", "key": "x", "fp": "etag:1"})
+    path.write_text(down + "\n", encoding="utf-8")
+
+    up = SyncJournal(str(path), "up")
+    up.record("a.txt", "1:2")
+    up.clear()
+
+    assert path.read_text(encoding="utf-8").splitlines() == [down]
+    assert SyncJournal(str(path), "down").is_done("x", "etag:1")
+    assert not SyncJournal(str(path), "up").is_done("a.txt", "1:2")
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import pytest
+
+from miniosync import __main__ as cli
+from miniosync.sync import SyncResult
+
+
+def _write_config(tmp_path) -> str:
+    path = tmp_path / "config.yaml"
+    path.write_text(f'bucket: "bucket"\nlocal_dir: "{tmp_path}"\n', encoding="utf-8")
+    return str(path)
+
+
+def test_sync_exit_code_reflects_failures(tmp_path, monkeypatch):
+    config = _write_config(tmp_path)
+    monkeypatch.setattr(cli, "sync_up", lambda cfg: SyncResult("up", 1, 0, 0, [("a", "boom")]))
+    monkeypatch.setattr(cli, "sync_down", lambda cfg: SyncResult("down", 1, 0, 0, []))
+    assert cli.main(["sync", "up", "--config", config]) == 1
+    assert cli.main(["sync", "down", "--config", config]) == 0
+
+
+def test_bench_rejects_unknown_engine(tmp_path, monkeypatch):
+    config = _write_config(tmp_path)
+    monkeypatch.setattr(cli, "run_benchmark", lambda *args: pytest.fail("benchmark should not run"))
+    with pytest.raises(SystemExit) as exc:
+        cli.main(["bench", "--config", config, "--engines", "thread,foo"])
+    assert exc.value.code == 2
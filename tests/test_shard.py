@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+
+import pytest
+
+from miniosync.config import SyncConfig
+from miniosync.shard import iter_shard_objects, shard_of, summarize_shard_reports, walk_shard_files, write_shard_report
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LAYOUT = [
+    "root.txt",
+    "top.bin",
+    "a/one.txt",
+    "a/b/two.txt",
+    "a/b/c/three.txt",
+    "a/d/four.txt",
+    "e/f/g/h/five.txt",
+    "e/six.txt",
+] + [f"m{i}/n{j}/k{k}.dat" for i in range(6) for j in range(3) for k in range(2)]
+
+
+def _make_tree(base, rels) -> None:
+    for rel in rels:
+        path = os.path.join(base, *rel.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(rel)
+
+
+def _cfg(local_dir: str, index: int = 0, count: int = 1, depth: int = 1) -> SyncConfig:
+    cfg = SyncConfig(
+        "127.0.0.1:9000", False, "a", "b", "bucket",
+        prefix="p/", local_dir=local_dir, include=["*"],
+        shard_index=index, shard_count=count, shard_depth=depth,
+    )
+    cfg.normalize()
+    return cfg
+
+
+@dataclass
+class FakeObject:
+    object_name: str
+    is_dir: bool = False
+
+
+class FakeListingClient:
+    # 按 S3 delimiter="/" 语义模拟 list_objects，并记录列举过的前缀
+    def __init__(self, keys) -> None:
+        self.keys = sorted(keys)
+        self.listed = []
+
+    def list_objects(self, bucket, prefix="", recursive=False):
+        self.listed.append((prefix, recursive))
+        dirs = set()
+        for key in self.keys:
+            if not key.startswith(prefix):
+                continue
+            rest = key[len(prefix):]
+            if recursive or "/" not in rest:
+                yield FakeObject(key)
+            else:
+                d = prefix + rest.split("/", 1)[0] + "/"
+                if d not in dirs:
+                    dirs.add(d)
+                    yield FakeObject(d, is_dir=True)
+
+
+def test_shard_of_is_deterministic_and_in_range():
+    for rel in LAYOUT:
+        for depth in (0, 1, 2):
+            s = shard_of(rel, 5, depth)
+            assert 0 <= s < 5
+            assert s == shard_of(rel, 5, depth)
+    # 同一分片单位下的文件落在同一分片
+    assert shard_of("m1/n0/k0.dat", 7, 1) == shard_of("m1/n2/k1.dat", 7, 1)
+    assert shard_of("m1/n0/k0.dat", 7, 2) == shard_of("m1/n0/k1.dat", 7, 2)
+
+
+@pytest.mark.parametrize("depth", [0, 1, 2, 3])
+def test_walk_and_listing_agree(tmp_path, depth):
+    _make_tree(str(tmp_path), LAYOUT)
+    client = FakeListingClient(["p/" + rel for rel in LAYOUT])
+    count = 4
+    seen_local, seen_remote = [], []
+    for index in range(count):
+        cfg = _cfg(str(tmp_path), index, count, depth)
+        local = sorted(rel for _, rel in walk_shard_files(cfg))
+        remote = sorted(obj.object_name[len("p/"):] for obj in iter_shard_objects(client, cfg) if not obj.is_dir)
+        assert local == remote
+        assert all(shard_of(rel, count, depth) == index for rel in local)
+        seen_local += local
+        seen_remote += remote
+    # 各分片互不重叠，合起来覆盖全部文件
+    assert sorted(seen_local) == sorted(LAYOUT)
+    assert sorted(seen_remote) == sorted(LAYOUT)
+
+
+def test_listing_only_recurses_into_owned_units(tmp_path):
+    client = FakeListingClient(["p/" + rel for rel in LAYOUT])
+    cfg = _cfg(str(tmp_path), 0, 4, 2)
+    list(iter_shard_objects(client, cfg))
+    for prefix, recursive in client.listed:
+        rel = prefix[len("p/"):].rstrip("/")
+        if recursive:
+            assert rel.count("/") == 1
+            assert shard_of(rel, 4, 2) == 0
+        else:
+            assert rel.count("/") == 0
+
+
+def _write_report(report_dir: str, index: int, run_id: str, mtime: float) -> None:
+    cfg = _cfg(report_dir, index, 2)
+    cfg.report_dir = report_dir
+    cfg.run_id = run_id
+    path = write_shard_report(cfg, {"direction": "up", "transferred": 1, "skipped": 0, "deleted": 0, "failures": []})
+    os.utime(path, (mtime, mtime))
+
+
+def test_summary_ignores_reports_from_other_runs(tmp_path, capsys):
+    report_dir = str(tmp_path / "reports")
+    now = time.time()
+    _write_report(report_dir, 0, "run-1", now - 100)
+    _write_report(report_dir, 1, "run-1", now - 100)
+    assert summarize_shard_reports(report_dir, "run-1") == 0
+
+    # 第二次运行中 shard 1 在写结果前崩溃，目录里只剩它上一次的结果
+    _write_report(report_dir, 0, "run-2", now)
+    capsys.readouterr()
+    assert summarize_shard_reports(report_dir, "run-2") == 1
+    assert "Missing shards (run 'run-2'): 1" in capsys.readouterr().out
+    # 不指定 run id 时取最新一次运行
+    assert summarize_shard_reports(report_dir) == 1
+    assert summarize_shard_reports(report_dir, "run-3") == 1
+
+
+# ---- 多进程 + 本地 S3 替身（moto）----
+
+
+def _write_config(tmp_path, endpoint: str, bucket: str, prefix: str, local_dir: str) -> str:
+    path = tmp_path / f"{bucket}-{prefix.strip('/')}.yaml"
+    path.write_text(
+        f'endpoint: "{endpoint}"\naccess_key: "test"\nsecret_key: "testtest"\n'
+        f'bucket: "{bucket}"\nprefix: "{prefix}"\nlocal_dir: "{local_dir}"\ninclude: ["*"]\n',
+        encoding="utf-8",
+    )
+    return str(path)
+
+
+def _run(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-m", "miniosync", *args],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+
+
+def _remote_keys(endpoint: str, bucket: str, prefix: str):
+    from miniosync.client import build_minio_client
+
+    client = build_minio_client(endpoint, "test", "testtest", False)
+    return sorted(o.object_name[len(prefix):] for o in client.list_objects(bucket, prefix=prefix, recursive=True))
+
+
+@pytest.mark.parametrize("depth", [1, 0])
+def test_spawned_shards_match_single_process(tmp_path, s3_endpoint, depth):
+    data = tmp_path / "data"
+    _make_tree(str(data), LAYOUT)
+    bucket = f"shard-depth-{depth}"
+    single = _write_config(tmp_path, s3_endpoint, bucket, "single/", str(data))
+    sharded = _write_config(tmp_path, s3_endpoint, bucket, "sharded/", str(data))
+    reports = str(tmp_path / "reports")
+
+    assert _run("sync", "up", "--config", single).returncode == 0
+    proc = _run(
+        "sync", "up", "--config", sharded, "--spawn", "3",
+        "--shard-depth", str(depth), "--report-dir", reports,
+    )
+    assert proc.returncode == 0, proc.stdout + proc.stderr
+    assert f"Total: Transferred: {len(LAYOUT)}," in proc.stdout
+    assert _remote_keys(s3_endpoint, bucket, "sharded/") == _remote_keys(s3_endpoint, bucket, "single/")
+    assert _remote_keys(s3_endpoint, bucket, "sharded/") == sorted(LAYOUT)
+
+    # 删除一部分本地文件后做分片镜像删除：远端应恰好删掉这些对象
+    removed = ["root.txt", "a/b/c/three.txt", "m2/n1/k0.dat", "m4/n0/k1.dat", "e/f/g/h/five.txt"]
+    for rel in removed:
+        os.remove(os.path.join(str(data), *rel.split("/")))
+    proc = _run(
+        "sync", "up", "--config", sharded, "--spawn", "3", "--mirror",
+        "--shard-depth", str(depth), "--report-dir", reports,
+    )
+    assert proc.returncode == 0, proc.stdout + proc.stderr
+    assert f"Deleted: {len(removed)}," in proc.stdout.splitlines()[-1]
+    assert _remote_keys(s3_endpoint, bucket, "sharded/") == sorted(set(LAYOUT) - set(removed))